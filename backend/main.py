@@ -49,6 +49,11 @@ export_service = ExportService()
 
 SUPPORTED_EXTENSIONS = ('.xls', '.xlsx', '.pdf')
 
+PARTY_SUFFIX_REGEX = re.compile(
+    r'\b(?:TRADERS|TRDG|AGENCIES|SERVICES|PVT|LTD|LIMITED|CORP|INC|COMPANY|HOLDINGS|INDUSTRIES)\b',
+    re.IGNORECASE
+)
+
 
 def _extract_party_from_narration(narration: str) -> Optional[str]:
     """
@@ -154,10 +159,7 @@ def _extract_party_from_narration(narration: str) -> Optional[str]:
     # ========== NORMALIZE PARTY NAME ==========
     if party:
         # Remove business suffixes
-        suffixes = ['TRADERS', 'TRDG', 'AGENCIES', 'SERVICES', 'PVT', 'LTD', 'LIMITED',
-                   'CORP', 'INC', 'COMPANY', 'HOLDINGS', 'INDUSTRIES']
-        for suffix in suffixes:
-            party = re.sub(rf'\b{suffix}\b', '', party, flags=re.IGNORECASE)
+        party = PARTY_SUFFIX_REGEX.sub('', party)
         
         # Remove special characters and digits
         party = re.sub(r'[^\w\s]', ' ', party)
@@ -499,8 +501,9 @@ async def analyze_multiple_statements(files: List[UploadFile] = File(...)):
                 if registered_party and registered_party in entity_normalizer.entities:
                     txn['party'] = registered_party
                     txn['detected_party'] = registered_party
-            
-            category_data = categorizer.categorize_transaction(txn)
+        
+        # Categorize in one batch; the party pass above doesn't touch description/credit/debit
+        for txn, category_data in zip(all_transactions, categorizer.categorize_many(all_transactions)):
             txn.update(category_data)
         
         logger.info(f"Party extraction stats (multi-file): {party_extraction_stats}")
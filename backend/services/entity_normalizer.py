@@ -135,6 +135,9 @@ class EntityNormalizer:
             'CORP', 'CORPORATION', 'INC', 'COMPANY', 'CO', 'HOLDINGS', 'HDG',
             'INDUSTRIES', 'CONSTRUCTIONS', 'DEVELOPERS', 'REALTY', 'ESTATES',
         ]
+        self._suffix_regex = re.compile(
+            r'\b(?:' + '|'.join(map(re.escape, self.suffixes_to_remove)) + r')\b', re.IGNORECASE
+        )
         
         # ========== MERCHANT ALIASES ==========
         self.merchant_aliases = {
@@ -298,8 +301,7 @@ class EntityNormalizer:
         name = re.sub(r'[^\w\s]', ' ', name)
         
         # Remove business suffixes
-        for suffix in self.suffixes_to_remove:
-            name = re.sub(r'\b' + suffix + r'\b', '', name, flags=re.IGNORECASE).strip()
+        name = self._suffix_regex.sub('', name).strip()
         
         # Remove common prefixes
         name = re.sub(r'^(?:TO|FROM|FOR|AT|ON|BY|REF|REFNO|NO|NEW|AC|ACC|ACCOUNT|TRANSFER|TRF)\s*', '', name, flags=re.IGNORECASE)
@@ -3,12 +3,14 @@ Excel Processor - Universal Transaction Extractor
 Supports ANY Indian bank Excel statement (XLS/XLSX)
 """
 
+import functools
 import io
 import logging
 import re
 from datetime import datetime
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
@@ -19,6 +21,23 @@ logging.basicConfig(level=logging.INFO)
 # HELPERS
 # ============================================================
 
+class _NormalizeTable(dict):
+    """str.translate table keeping word chars, whitespace and /@.- (other chars -> space).
+
+    Filled lazily so it covers any code point with the same rules as the
+    regex [^\\w\\s/@.-].
+    """
+
+    def __missing__(self, code: int):
+        ch = chr(code)
+        keep = ch.isalnum() or ch.isspace() or ch in '_/@.-'
+        self[code] = code if keep else ' '
+        return self[code]
+
+
+_NORMALIZE_TABLE = _NormalizeTable()
+
+
 def safe_float(val, default=0.0) -> float:
     try:
         return float(val)
@@ -29,20 +48,29 @@ def safe_float(val, default=0.0) -> float:
 def normalize_text(text) -> str:
     if text is None or (isinstance(text, float) and pd.isna(text)):
         return ""
-    text = str(text).upper()
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'[^\w\s/@.-]', ' ', text)
-    return text.strip()
+    text = " ".join(str(text).upper().split())
+    return text.translate(_NORMALIZE_TABLE).strip()
 
 
 # ============================================================
 # EXCEL PROCESSOR
 # ============================================================
 
+TRANSACTION_COLUMNS = [
+    'date', 'description', 'amount', 'credit', 'debit', 'balance',
+    'party', 'detected_party', 'party_confidence',
+    'source', 'source_file', 'source_sheet', 'is_upi', 'is_transfer',
+]
+
 class ExcelProcessor:
 
     def __init__(self):
-        self.party_cache: Dict[str, Tuple[str, float]] = {}
+        # Bounded per-instance cache keyed on the full narration; recurring
+        # payees are common in statements
+        self._party_lookup = functools.lru_cache(maxsize=4096)(self._lookup_party)
+
+        # Large sheets are probed with this many rows before a full parse
+        self.header_probe_rows = 200
 
         self.date_formats = [
             '%d-%b-%Y', '%d-%b-%y', '%d/%m/%Y',
@@ -71,12 +99,32 @@ class ExcelProcessor:
             r'\bIRCTC\b': 'IRCTC',
         }
 
+        # Compiled once; these run per row / per narration
+        # One group per merchant in table priority order, wrapped in a lookahead so
+        # finditer reports every start position; the lowest m.lastindex wins
+        self._merchant_re = re.compile('(?=' + '|'.join(f'({p})' for p in self.known_merchants) + ')')
+        self._merchant_names = list(self.known_merchants.values())
+        self._suffix_re = re.compile(r'\b(?:' + '|'.join(map(re.escape, self.business_suffixes)) + r')\b')
+        self._upi_re = re.compile(r'\b(?:UPI|@|GPAY|PHONEPE|PAYTM|BHIM)\b')
+        self._transfer_re = re.compile(r'\b(?:NEFT|IMPS|RTGS|TRANSFER|TRF)\b')
+        self._upi_handle_re = re.compile(r'@([A-Z0-9]+)')
+        self._to_from_re = re.compile(r'\b(TO|FROM|BY)\s+([A-Z][A-Z\s]{2,})')
+        self._non_word_re = re.compile(r'[^\w\s]')
+        self._amt_clean_re = re.compile(r'[^\d.-]')
+        self._holder_name_re = re.compile(r'(ACCOUNT HOLDER|NAME)\s*[:\-]?\s*([A-Z\s]{3,})')
+        self._account_no_re = re.compile(r'ACCOUNT\s*(NO|NUMBER)?\s*[:\-]?\s*([A-Z0-9]{6,})')
+
     # ========================================================
     # PUBLIC ENTRY
     # ========================================================
 
     def extract_transactions(self, file_content: bytes, filename: str = "") -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
-        transactions: List[Dict[str, Any]] = []
+        frame, account_profile = self.extract_transactions_frame(file_content, filename)
+        return frame.to_dict(orient='records'), account_profile
+
+    def extract_transactions_frame(self, file_content: bytes, filename: str = "") -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Same as extract_transactions, but returns the rows as one DataFrame (TRANSACTION_COLUMNS)"""
+        frames: List[pd.DataFrame] = []
         account_profile: Dict[str, Any] = {}
 
         try:
@@ -84,19 +132,31 @@ class ExcelProcessor:
 
             for sheet_name in excel.sheet_names:
                 try:
-                    raw_df = pd.read_excel(excel, sheet_name=sheet_name, header=None)
+                    # Probe the top of big sheets so non-data sheets are never fully parsed.
+                    # The declared size can be stale, so it only picks the read strategy
+                    # and never causes a sheet to be skipped.
+                    row_count = self._sheet_row_count(excel, sheet_name)
+                    probe = row_count is not None and row_count > self.header_probe_rows
+                    raw_df = pd.read_excel(
+                        excel, sheet_name=sheet_name, header=None,
+                        nrows=self.header_probe_rows if probe else None,
+                    )
                     account_profile.update(self._extract_account_profile(raw_df))
 
                     header_row = self._detect_header_row(raw_df)
                     if header_row is None:
                         continue
+                    if probe:
+                        raw_df = pd.read_excel(excel, sheet_name=sheet_name, header=None)
 
-                    df = pd.read_excel(excel, sheet_name=sheet_name, header=header_row)
-                    df.columns = [normalize_text(c) for c in df.columns]
+                    # Reuse the raw read instead of parsing the sheet a second time
+                    df = raw_df.iloc[header_row + 1:].infer_objects()
+                    df.columns = [normalize_text(c) for c in raw_df.iloc[header_row]]
                     df = self._normalize_columns(df)
 
                     sheet_txns = self._extract_from_dataframe(df, filename, sheet_name)
-                    transactions.extend(sheet_txns)
+                    if not sheet_txns.empty:
+                        frames.append(sheet_txns)
 
                 except Exception as e:
                     logger.warning(f"Sheet '{sheet_name}' skipped: {e}")
@@ -104,7 +164,23 @@ class ExcelProcessor:
         except Exception as e:
             logger.error(f"Excel read error: {e}")
 
-        return transactions, account_profile
+        if not frames:
+            return pd.DataFrame(columns=TRANSACTION_COLUMNS), account_profile
+        return pd.concat(frames, ignore_index=True), account_profile
+
+    def _sheet_row_count(self, excel: pd.ExcelFile, sheet_name: str) -> Optional[int]:
+        """Declared row count from the sheet dimensions, without parsing cells (None if unknown).
+
+        openpyxl reads this from the <dimension> tag, which some writers get
+        wrong, so treat it as a hint only.
+        """
+        try:
+            book = excel.book
+            if hasattr(book, 'sheet_by_name'):  # xlrd
+                return book.sheet_by_name(sheet_name).nrows
+            return book[sheet_name].max_row  # openpyxl; None if not recorded
+        except Exception:
+            return None
 
     # ========================================================
     # ACCOUNT PROFILE
@@ -112,18 +188,15 @@ class ExcelProcessor:
 
     def _extract_account_profile(self, df: pd.DataFrame) -> Dict[str, Any]:
         profile = {}
-        header_text = " ".join(
-            normalize_text(v)
-            for i in range(min(15, len(df)))
-            for v in df.iloc[i].values
-            if pd.notna(v)
-        )
-
-        name_match = re.search(r'(ACCOUNT HOLDER|NAME)\s*[:\-]?\s*([A-Z\s]{3,})', header_text)
+        # Flatten the top rows in one go; row order is kept (row-major ravel)
+        cells = pd.Series(df.head(15).to_numpy().ravel()).dropna()
+        header_text = " ".join(cells.map(normalize_text))
+
+        name_match = self._holder_name_re.search(header_text)
         if name_match:
             profile['account_holder_name'] = name_match.group(2).strip()
 
-        acc_match = re.search(r'ACCOUNT\s*(NO|NUMBER)?\s*[:\-]?\s*([A-Z0-9]{6,})', header_text)
+        acc_match = self._account_no_re.search(header_text)
         if acc_match:
             profile['account_number'] = acc_match.group(2)
 
@@ -135,10 +208,22 @@ class ExcelProcessor:
 
     def _detect_header_row(self, df: pd.DataFrame):
         keywords = ['DATE', 'DESCRIPTION', 'DEBIT', 'CREDIT', 'BALANCE', 'AMOUNT']
-        for idx, row in df.iterrows():
-            row_text = " ".join(normalize_text(v) for v in row.values if pd.notna(v))
-            if sum(1 for k in keywords if k in row_text) >= 2:
-                return idx
+        if df.empty:
+            return None
+
+        # Headers sit near the top, so scan in small chunks and stop at the first hit
+        for start in range(0, len(df), 50):
+            chunk = df.iloc[start:start + 50]
+            cells = chunk.astype(str).where(chunk.notna(), '')
+            row_text = cells.iloc[:, 0]
+            for col in range(1, cells.shape[1]):
+                row_text = row_text + ' ' + cells.iloc[:, col]
+            row_text = row_text.str.upper()
+
+            hits = sum(row_text.str.contains(k, regex=False).astype(int) for k in keywords)
+            matches = hits.index[hits >= 2]
+            if len(matches):
+                return matches[0]
         return None
 
     def _normalize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -160,6 +245,8 @@ class ExcelProcessor:
                 col_map[col] = 'amount'
 
         df = df.rename(columns=col_map)
+        # Keep the first match when several headers map to one field (e.g. TXN DATE / VALUE DATE)
+        df = df.loc[:, ~df.columns.duplicated()]
 
         final_cols = [c for c in ['date', 'description', 'credit', 'debit', 'balance', 'amount'] if c in df.columns]
         return df[final_cols]
@@ -168,57 +255,70 @@ class ExcelProcessor:
     # ROW PARSER
     # ========================================================
 
-    def _extract_from_dataframe(self, df: pd.DataFrame, filename: str, sheet_name: str):
-        transactions = []
-
-        for _, row in df.iterrows():
-            try:
-                date = self._parse_date(row.get('date'))
-                description = normalize_text(row.get('description'))
-
-                credit = self._parse_amount(row.get('credit'))
-                debit = self._parse_amount(row.get('debit'))
-                balance = self._parse_amount(row.get('balance'))
-                amount_col = self._parse_amount(row.get('amount'))
-
-                if credit == debit == amount_col == 0 and not description:
-                    continue
-
-                if credit > 0:
-                    amount = credit
-                elif debit > 0:
-                    amount = -debit
-                else:
-                    amount = amount_col
-
-                party, confidence = self._extract_party(description)
-
-                transactions.append({
-                    'date': date,
-                    'description': description,
-                    'amount': amount,
-                    'credit': credit,
-                    'debit': debit,
-                    'balance': balance,
-                    'party': party,
-                    'detected_party': party,
-                    'party_confidence': round(confidence, 3),
-                    'source': 'excel',
-                    'source_file': filename,
-                    'source_sheet': sheet_name,
-                    'is_upi': bool(re.search(r'\b(UPI|@|GPAY|PHONEPE|PAYTM|BHIM)\b', description)),
-                    'is_transfer': bool(re.search(r'\b(NEFT|IMPS|RTGS|TRANSFER|TRF)\b', description)),
-                })
-
-            except Exception as e:
-                logger.debug(f"Row skipped: {e}")
-
-        return transactions
+    def _extract_from_dataframe(self, df: pd.DataFrame, filename: str, sheet_name: str) -> pd.DataFrame:
+        # Build every output field as a column; records are materialized once by the caller
+        df = df.reindex(columns=['date', 'description', 'credit', 'debit', 'balance', 'amount'])
+        df['description'] = df['description'].map(normalize_text)
+        for col in ('credit', 'debit', 'amount'):
+            df[col] = self._parse_amount_column(df[col])
+
+        # Drop blank rows before the remaining per-row work (dates, balance, party)
+        empty = (df['credit'] == 0) & (df['debit'] == 0) & (df['amount'] == 0) & (df['description'] == '')
+        df = df[~empty].copy()
+        if df.empty:
+            return df.iloc[:0].reindex(columns=TRANSACTION_COLUMNS)
+
+        df['date'] = self._parse_date_column(df['date'])
+        df['balance'] = self._parse_amount_column(df['balance'])
+
+        credit, debit = df['credit'], df['debit']
+        df['amount'] = np.where(credit > 0, credit, np.where(debit > 0, -debit, df['amount']))
+
+        parties = [self._extract_party(d) for d in df['description']]
+        df['party'] = pd.Series([p for p, _ in parties], index=df.index, dtype=object)
+        df['detected_party'] = df['party']
+        df['party_confidence'] = [round(c, 3) for _, c in parties]
+        df['source'] = 'excel'
+        df['source_file'] = filename
+        df['source_sheet'] = sheet_name
+        df['is_upi'] = df['description'].str.contains(self._upi_re)
+        df['is_transfer'] = df['description'].str.contains(self._transfer_re)
+
+        return df[TRANSACTION_COLUMNS]
 
     # ========================================================
     # DATE / AMOUNT
     # ========================================================
 
+    def _parse_date_column(self, col: pd.Series) -> pd.Series:
+        result = pd.Series(None, index=col.index, dtype=object)
+        present = col.notna()
+
+        if pd.api.types.is_datetime64_any_dtype(col):
+            result[present] = col[present].dt.strftime('%d/%m/%Y')
+            return result.where(present, None)
+
+        is_datetime = col.map(lambda v: isinstance(v, datetime)).astype(bool) & present
+        if is_datetime.any():
+            # Formatted per cell: pd.to_datetime would raise OutOfBoundsDatetime
+            # on typo years past 2262 and drop the whole sheet
+            result[is_datetime] = col[is_datetime].map(lambda v: v.strftime('%d/%m/%Y'))
+
+        # One vectorized pass per known format; whatever is left goes through
+        # the scalar parser so unusual values still behave as before.
+        remaining = col[present & ~is_datetime].map(normalize_text)
+        for fmt in self.date_formats:
+            if remaining.empty:
+                break
+            parsed = pd.to_datetime(remaining, format=fmt, errors='coerce')
+            hit = parsed.notna()
+            result[hit[hit].index] = parsed[hit].dt.strftime('%d/%m/%Y')
+            remaining = remaining[~hit]
+
+        if not remaining.empty:
+            result[remaining.index] = col[remaining.index].map(self._parse_date)
+        return result.where(present, None)
+
     def _parse_date(self, val):
         if val is None or (isinstance(val, float) and pd.isna(val)):
             return None
@@ -235,11 +335,11 @@ class ExcelProcessor:
 
         return s
 
-    def _parse_amount(self, val) -> float:
-        if val is None or (isinstance(val, float) and pd.isna(val)):
-            return 0.0
-        s = re.sub(r'[^\d.-]', '', str(val))
-        return safe_float(s)
+    def _parse_amount_column(self, col: pd.Series) -> pd.Series:
+        if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+            return col.fillna(0.0).astype(float)
+        cleaned = col.astype(str).str.replace(self._amt_clean_re, '', regex=True)
+        return pd.to_numeric(cleaned, errors='coerce').fillna(0.0)
 
     # ========================================================
     # PARTY EXTRACTION
@@ -248,45 +348,40 @@ class ExcelProcessor:
     def _extract_party(self, narration: str) -> Tuple[str, float]:
         if not narration:
             return None, 0.0
+        return self._party_lookup(narration)
 
-        cache_key = narration[:80]
-        if cache_key in self.party_cache:
-            return self.party_cache[cache_key]
-
+    def _lookup_party(self, narration: str) -> Tuple[str, float]:
         # Known merchants
-        for pat, name in self.known_merchants.items():
-            if re.search(pat, narration):
-                self.party_cache[cache_key] = (name, 0.95)
-                return name, 0.95
+        best = None
+        for m in self._merchant_re.finditer(narration):
+            if best is None or m.lastindex < best.lastindex:
+                best = m
+                if best.lastindex == 1:
+                    break
+        if best:
+            return self._merchant_names[best.lastindex - 1], 0.95
 
         # UPI handles
-        m = re.search(r'@([A-Z0-9]+)', narration)
+        m = self._upi_handle_re.search(narration)
         if m:
-            party = m.group(1)
-            self.party_cache[cache_key] = (party, 0.85)
-            return party, 0.85
+            return m.group(1), 0.85
 
         # TO / FROM patterns
-        m = re.search(r'\b(TO|FROM|BY)\s+([A-Z][A-Z\s]{2,})', narration)
+        m = self._to_from_re.search(narration)
         if m:
-            party = self._clean_party(m.group(2))
-            self.party_cache[cache_key] = (party, 0.7)
-            return party, 0.7
+            return self._clean_party(m.group(2)), 0.7
 
         # Fallback meaningful words
         words = [w for w in narration.split() if len(w) > 3 and not w.isdigit()]
         party = self._clean_party(" ".join(words[:3])) if words else None
         confidence = 0.4 if party else 0.1
-
-        self.party_cache[cache_key] = (party, confidence)
         return party, confidence
 
     def _clean_party(self, name: str):
         if not name:
             return None
-        for s in self.business_suffixes:
-            name = re.sub(rf'\b{s}\b', '', name)
-        name = re.sub(r'[^\w\s]', ' ', name)
+        name = self._suffix_re.sub('', name)
+        name = self._non_word_re.sub(' ', name)
         return " ".join(name.split()).strip()
 
     # ========================================================
@@ -294,4 +389,4 @@ class ExcelProcessor:
     # ========================================================
 
     def clear_cache(self):
-        self.party_cache.clear()
+        self._party_lookup.cache_clear()
@@ -3,18 +3,32 @@ Universal Bank Statement PDF Analyzer
 Returns LIST ONLY for compatibility
 """
 
+import functools
 import re
 import logging
+from bisect import bisect_right
+from itertools import accumulate, islice
 from typing import List, Dict, Any
 from io import BytesIO
 
 import pdfplumber
+import pypdfium2 as pdfium
 import PyPDF2
 from services.transaction_detector import AdvancedTransactionDetector, TransactionType, get_detector
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("pdf_processor")
 
+_CURRENCY_RE = re.compile(r'[₹$€£¥]\s*([\d,]+\.?\d*)')
+_DECIMAL_RE = re.compile(r'([\d,]+\.\d{2})')
+# CR and DR markers in one pass. The lookahead reports every start position
+# (e.g. both "/CR/" and the "CR" inside it), as separate per-marker scans did;
+# no position can start both a CR and a DR marker.
+_DIRECTION_RE = re.compile(
+    r'(?=(?P<cr>\bCR\b|\bCr\.\b|\bCREDIT\b|/CR/)'
+    r'|(?P<dr>\bDR\b|\bDr\.\b|\bDEBIT\b|/DR/))'
+)
+
 
 def safe_float(val, default=0.0) -> float:
     if val is None:
@@ -27,32 +41,35 @@ def safe_float(val, default=0.0) -> float:
         return default
 
 
+def _plumber_page_text(page) -> str:
+    """Extract one pdfplumber page's text and release its cached layout objects"""
+    try:
+        return page.extract_text() or ""
+    finally:
+        # Page.close() only exists from pdfplumber 0.11; this is what it does
+        page.flush_cache()
+        page.get_textmap.cache_clear()
+
+
 def extract_amount_from_text(text: str) -> List[float]:
     """Extract all amounts from text"""
     amounts = []
+    append = amounts.append
     
-    currency_patterns = [r'[₹$€£¥]\s*([\d,]+\.?\d*)']
-    
-    for pattern in currency_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            cleaned = re.sub(r'[,\s]', '', match)
-            try:
-                amount = float(cleaned)
-                if amount > 0:
-                    amounts.append(amount)
-            except ValueError:
-                continue
-    
-    decimal_matches = re.findall(r'([\d,]+\.\d{2})', text)
-    for match in decimal_matches:
-        cleaned = re.sub(r'[,\s]', '', match)
+    # Neither pattern can capture whitespace, so only commas need stripping
+    for match in _CURRENCY_RE.findall(text):
         try:
-            amount = float(cleaned)
-            if 1 <= amount <= 999999:
-                amounts.append(amount)
-        except ValueError:
+            amount = float(match.replace(',', ''))
+        except ValueError:  # e.g. a bare "₹,"
             continue
+        if amount > 0:
+            append(amount)
+    
+    # Always digits + ".dd" once commas are gone, so float() cannot fail
+    for match in _DECIMAL_RE.findall(text):
+        amount = float(match.replace(',', ''))
+        if 1 <= amount <= 999999:
+            append(amount)
     
     return amounts
 
@@ -61,27 +78,13 @@ def detect_transaction_direction(text: str) -> str:
     """Detect if a transaction is a credit or debit"""
     text_upper = text.upper()
     
-    cr_patterns = [r'\bCR\b', r'\bCr\.\b', r'\bCREDIT\b', r'/CR/']
-    dr_patterns = [r'\bDR\b', r'\bDr\.\b', r'\bDEBIT\b', r'/DR/']
-    
-    all_cr_positions = []
-    all_dr_positions = []
-    
-    for pattern in cr_patterns:
-        for m in re.finditer(pattern, text_upper):
-            all_cr_positions.append(m.start())
+    # The rightmost marker decides the direction
+    last = None
+    for last in _DIRECTION_RE.finditer(text_upper):
+        pass
     
-    for pattern in dr_patterns:
-        for m in re.finditer(pattern, text_upper):
-            all_dr_positions.append(m.start())
-    
-    last_cr = max(all_cr_positions) if all_cr_positions else -1
-    last_dr = max(all_dr_positions) if all_dr_positions else -1
-    
-    if last_cr > last_dr:
-        return 'credit'
-    elif last_dr > last_cr:
-        return 'debit'
+    if last is not None:
+        return 'credit' if last.lastgroup == 'cr' else 'debit'
     else:
         if 'PAID TO' in text_upper:
             return 'debit'
@@ -103,11 +106,40 @@ class PDFProcessor:
     
     AMOUNT_REGEX = re.compile(r'[\d,]+\.\d{2}')
     
-    SKIP_WORDS = {
+    CURRENCY_AMOUNT_REGEX = re.compile(r'[₹$€£¥]\s*[\d,]+\.?\d*')
+    
+    # One group per narration format, in priority order. Wrapped in a
+    # lookahead so a single finditer pass reports every start position
+    # without earlier matches consuming later ones; m.lastindex is the format.
+    PARTY_REGEX = re.compile(
+        r'(?=UPI/(?:CR|DR)/\d+/([A-Z\s]+)'
+        r'|IMPS/\d+/([A-Z\s]+)'
+        r'|NEFT/([A-Z\s]+)'
+        r'|TRANSFER TO ([A-Z\s]+)'
+        r'|FROM ([A-Z\s]+))'
+    )
+    
+    NON_ALPHA_REGEX = re.compile(r'[^A-Z\s]')
+    
+    # Dates, currency amounts and plain decimal amounts, removed in one pass
+    DESCRIPTION_NOISE_REGEX = re.compile(
+        '|'.join((DATE_REGEX.pattern, CURRENCY_AMOUNT_REGEX.pattern, AMOUNT_REGEX.pattern))
+    )
+    
+    SKIP_WORDS = frozenset({
         "UPI", "IMPS", "NEFT", "RTGS", "DR", "CR", "DEBIT", "CREDIT",
         "TRANSFER", "PAYMENT", "WITHDRAWAL", "ATM", "WDL",
         "BANK", "INDIA", "ONLINE", "MOBILE"
-    }
+    })
+    # Longer tokens cannot be skip words, so they bypass the set lookup
+    MAX_SKIP_LEN = max(map(len, SKIP_WORDS))
+    
+    def __init__(self):
+        self._detector = get_detector()
+        # Bounded per-instance caches; counterparties and dates repeat
+        # across statement rows, and the processor lives for the whole app
+        self._party_cleanup = functools.lru_cache(maxsize=1024)(self._clean_party)
+        self._date_lookup = functools.lru_cache(maxsize=1024)(self._format_date)
     
     def extract_transactions(self, pdf_bytes: bytes) -> List[Dict[str, Any]]:
         """
@@ -121,59 +153,83 @@ class PDFProcessor:
         return self._parse_transactions(text)
     
     def _extract_text(self, pdf_bytes: bytes) -> str:
-        """Extract text from PDF"""
-        text = ""
-        
+        """Extract text from PDF (pdfplumber, then pypdfium2, then PyPDF2)"""
+        # pdfplumber lays text out in visual row order, which _parse_transactions
+        # relies on; pypdfium2 and PyPDF2 follow content-stream order (a table
+        # drawn column by column comes out column by column), so they only
+        # cover files pdfplumber can't read. pdfplumber leaves caller-owned
+        # streams open, so PyPDF2 reuses the same buffer.
+        buf = BytesIO(pdf_bytes)
+        pages = []
         try:
-            with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-                for page in pdf.pages:
-                    t = page.extract_text()
-                    if t:
-                        text += t + "\n"
+            with pdfplumber.open(buf) as pdf:
+                pages = [_plumber_page_text(page) for page in pdf.pages]
         except Exception as e:
             logger.warning(f"pdfplumber failed: {e}")
         
+        text = "".join(t + "\n" for t in pages if t)
         if text.strip():
             return text
         
         try:
-            reader = PyPDF2.PdfReader(BytesIO(pdf_bytes))
-            for page in reader.pages:
-                t = page.extract_text()
-                if t:
-                    text += t + "\n"
+            pdfium_text = self._extract_text_pdfium(pdf_bytes)
+            if pdfium_text.strip():
+                return pdfium_text
+        except Exception as e:
+            logger.warning(f"pypdfium2 failed: {e}")
+        
+        try:
+            buf.seek(0)
+            reader = PyPDF2.PdfReader(buf)
+            text += "".join(t + "\n" for t in (page.extract_text() for page in reader.pages) if t)
         except Exception as e:
             logger.warning(f"PyPDF2 failed: {e}")
         
         return text
     
+    def _extract_text_pdfium(self, pdf_bytes: bytes) -> str:
+        """Extract text with pypdfium2, closing each page and text page as we go"""
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            pages = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                try:
+                    pages.append(textpage.get_text_range())
+                finally:
+                    textpage.close()
+                    page.close()
+            return "\n".join(pages)
+        finally:
+            pdf.close()
+    
     def _parse_transactions(self, text: str) -> List[Dict[str, Any]]:
         """Parse transactions from extracted text"""
-        lines = [l.strip() for l in text.splitlines() if l.strip()]
+        raw_lines = text.splitlines(keepends=True)
+        line_starts = list(accumulate(map(len, raw_lines), initial=0))
+        
+        # One DATE_REGEX pass over the whole text; a date never spans a line
+        # break, so this finds the same first date per line as a per-line search
+        date_lines: Dict[int, re.Match] = {}
+        first_date_on_line = date_lines.setdefault
+        for m in self.DATE_REGEX.finditer(text):
+            first_date_on_line(bisect_right(line_starts, m.start()) - 1, m)
+        
+        # Each block runs from a dated line up to the next dated line
+        block_starts = list(date_lines)
+        block_ends = block_starts[1:] + [len(raw_lines)]
         transactions = []
         
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            
-            date_match = self.DATE_REGEX.search(line)
-            if not date_match:
-                i += 1
-                continue
-            
-            date = self._normalize_date(date_match.group(1))
-            
-            block = [line]
-            j = i + 1
-            while j < len(lines) and not self.DATE_REGEX.search(lines[j]):
-                block.append(lines[j])
-                j += 1
+        # Bound once; these run per block
+        normalize_date, parse_block, append = self._normalize_date, self._parse_block, transactions.append
+        
+        for start, end in zip(block_starts, block_ends):
+            date = normalize_date(date_lines[start].group(1))
+            block = [l for l in (raw.strip() for raw in raw_lines[start:end]) if l]
             
-            txn = self._parse_block(date, block)
+            txn = parse_block(date, block)
             if txn:
-                transactions.append(txn)
-            
-            i = j
+                append(txn)
         
         return transactions
     
@@ -185,41 +241,21 @@ class PDFProcessor:
         
         debit = credit = balance = 0.0
         
-        if len(amounts) == 0:
-            legacy_amounts = [float(a.replace(",", "")) for a in self.AMOUNT_REGEX.findall(text)]
-            if len(legacy_amounts) > 0:
-                amounts = [a for a in legacy_amounts if 1 <= a <= 999999]
-        
-        detector = get_detector()
         # detect_transaction_type returns (TransactionType, confidence, signals) - 3 values!
-        result = detector.detect_transaction_type(
+        result = self._detector.detect_transaction_type(
             text, 0.0, 0.0, amounts[0] if amounts else 0.0
         )
         txn_type = result[0]  # Get only the transaction type
         
-        if len(amounts) == 1:
-            if txn_type == TransactionType.CREDIT:
-                credit = amounts[0]
-            elif txn_type == TransactionType.DEBIT:
-                debit = amounts[0]
-            else:
-                debit = amounts[0]
-        elif len(amounts) == 2:
-            if txn_type == TransactionType.CREDIT:
-                credit = amounts[0]
-            elif txn_type == TransactionType.DEBIT:
-                debit = amounts[0]
-            else:
-                debit = amounts[0]
-            balance = amounts[1]
-        elif len(amounts) >= 3:
+        # First amount is the transaction (debit unless detected as credit),
+        # the last one the running balance
+        if amounts:
             if txn_type == TransactionType.CREDIT:
                 credit = amounts[0]
-            elif txn_type == TransactionType.DEBIT:
-                debit = amounts[0]
             else:
                 debit = amounts[0]
-            balance = amounts[-1]
+            if len(amounts) >= 2:
+                balance = amounts[-1]
         
         if credit > 0:
             amount = credit
@@ -228,8 +264,9 @@ class PDFProcessor:
         else:
             amount = 0
         
-        txn_type_str = self._detect_type(text, debit, credit, txn_type)
-        party = self._extract_party(text)
+        text_upper = text.upper()
+        txn_type_str = self._detect_type(text_upper, debit, credit, txn_type)
+        party = self._extract_party(text_upper)
         description = self._clean_description(text)
         
         return {
@@ -245,63 +282,64 @@ class PDFProcessor:
             "source": "pdf"
         }
     
-    def _detect_type(self, text: str, debit, credit, detected_type=None) -> str:
-        """Detect transaction type string"""
-        t = text.upper()
-        
+    def _detect_type(self, text_upper: str, debit, credit, detected_type=None) -> str:
+        """Detect transaction type string from the upper-cased block text"""
         if detected_type is not None:
             if detected_type == TransactionType.CREDIT:
                 return "CREDIT"
             elif detected_type == TransactionType.DEBIT:
                 return "DEBIT"
         
-        if any(x in t for x in [" CREDIT", " CR", " DEPOSIT", "SALARY", "INCOME"]):
+        # Inlined substring checks (" CREDIT" is covered by " CR")
+        if (" CR" in text_upper or " DEPOSIT" in text_upper
+                or "SALARY" in text_upper or "INCOME" in text_upper):
             return "CREDIT"
-        if any(x in t for x in [" DEBIT", " DR", " WDL", " WITHDRAWAL", "PAID"]):
+        if (" DEBIT" in text_upper or " DR" in text_upper or " WDL" in text_upper
+                or " WITHDRAWAL" in text_upper or "PAID" in text_upper):
             return "DEBIT"
         
         if credit and not debit:
             return "CREDIT"
         return "DEBIT"
     
-    def _extract_party(self, text: str) -> str:
-        """Extract party name from transaction"""
-        text = text.upper()
-        
-        patterns = [
-            r'UPI/(?:CR|DR)/\d+/([A-Z\s]+)',
-            r'IMPS/\d+/([A-Z\s]+)',
-            r'NEFT/([A-Z\s]+)',
-            r'TRANSFER TO ([A-Z\s]+)',
-            r'FROM ([A-Z\s]+)'
-        ]
+    def _extract_party(self, text_upper: str) -> str:
+        """Extract party name from the upper-cased transaction text"""
+        best = None
+        for m in self.PARTY_REGEX.finditer(text_upper):
+            if best is None or m.lastindex < best.lastindex:
+                best = m
+                if best.lastindex == 1:
+                    break
+        if best:
+            return self._party_cleanup(best.group(best.lastindex))
         
-        for p in patterns:
-            m = re.search(p, text)
-            if m:
-                return self._clean_party(m.group(1))
+        # Cheap length / set checks first; only the first 4 words are used
+        skip_words, max_skip_len = self.SKIP_WORDS, self.MAX_SKIP_LEN
+        words = list(islice(
+            (w for w in text_upper.split()
+             if (n := len(w)) > 3
+             and (n > max_skip_len or w not in skip_words)
+             and w.isalpha()),
+            4,
+        ))
         
-        words = [
-            w for w in text.split()
-            if w.isalpha() and len(w) > 3 and w not in self.SKIP_WORDS
-        ]
-        
-        return " ".join(words[:4]) if words else "UNKNOWN"
+        return " ".join(words) if words else "UNKNOWN"
     
     def _clean_party(self, name: str) -> str:
         """Clean party name"""
-        name = re.sub(r'[^A-Z\s]', '', name)
+        name = self.NON_ALPHA_REGEX.sub('', name)
         return " ".join(name.split()).strip()
     
     def _clean_description(self, text: str) -> str:
         """Clean transaction description"""
-        text = self.DATE_REGEX.sub("", text)
-        text = re.sub(r'[₹$€£¥]\s*[\d,]+\.?\d*', '', text)
-        text = re.sub(r'[\d,]+\.\d{2}', '', text)
-        return " ".join(text.split()).strip()
+        text = self.DESCRIPTION_NOISE_REGEX.sub('', text)
+        return " ".join(text.split())
     
     def _normalize_date(self, raw: str) -> str:
         """Normalize date to DD/MM/YYYY"""
+        return self._date_lookup(raw)
+    
+    def _format_date(self, raw: str) -> str:
         raw = raw.replace("-", "/")
         d, m, y = raw.split("/")
         
@@ -309,3 +347,7 @@ class PDFProcessor:
             y = "20" + y
         
         return f"{d.zfill(2)}/{m.zfill(2)}/{y}"
+    
+    def clear_cache(self):
+        self._party_cleanup.cache_clear()
+        self._date_lookup.cache_clear()
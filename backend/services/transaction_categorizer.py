@@ -3,8 +3,9 @@ Transaction Categorization Service
 Uses NLP-based classification to categorize transactions
 """
 
+import functools
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,9 +27,29 @@ class TransactionCategorizer:
     def __init__(self):
         self.category_patterns = self._build_category_patterns()
         self.merchant_risk_keywords = self._build_risk_keywords()
+        
+        # Bounded per-instance cache keyed on the lower-cased description;
+        # recurring payees, SIPs and subscriptions repeat across rows
+        self._description_match = functools.lru_cache(maxsize=4096)(self._match_description)
+        
+        # (pattern, length, literal) per category pattern. Patterns too short to
+        # beat the current best match are skipped without searching; plain
+        # words are checked with a substring test instead of the regex engine.
+        self._category_candidates = {
+            cat: [
+                (p, len(p.pattern), p.pattern if re.escape(p.pattern) == p.pattern else None)
+                for p in pats
+            ]
+            for cat, pats in self.category_patterns.items()
+        }
+        # Any keyword in a tier decides the score, so each tier is one alternation
+        self._risk_regex = {
+            tier: re.compile('|'.join(k.pattern for k in words))
+            for tier, words in self.merchant_risk_keywords.items()
+        }
     
-    def _build_category_patterns(self) -> Dict[str, List[str]]:
-        return {
+    def _build_category_patterns(self) -> Dict[str, List[re.Pattern]]:
+        patterns = {
             'Income': [
                 r'salary', r'payroll', r'wages', r'income', r'credit.*salary',
                 r'employer', r'pay.*credit', r'salary.*credit', r'salary.*transfer'
@@ -79,37 +100,76 @@ class TransactionCategorizer:
                 r'pos.*transaction', r'card.*payment'
             ],
         }
-    
-    def _build_risk_keywords(self) -> Dict[str, float]:
         return {
+            cat: [re.compile(p, re.IGNORECASE) for p in pats]
+            for cat, pats in patterns.items()
+        }
+    
+    def _build_risk_keywords(self) -> Dict[str, List[re.Pattern]]:
+        keywords = {
             'high_risk': ['casino', 'gambling', 'betting', 'crypto', 'bitcoin', 'forex'],
             'medium_risk': ['online.*payment', 'international', 'foreign.*transaction'],
             'low_risk': ['salary', 'utility', 'government', 'bank']
         }
+        return {tier: [re.compile(k) for k in words] for tier, words in keywords.items()}
     
     def categorize_transaction(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
         description = str(transaction.get('description', '')).lower()
-
+        return self._build_category_data(transaction, self._description_match(description))
+    
+    def categorize_many(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Categorize a batch of transactions; repeated descriptions are matched once"""
+        match = self._description_match
+        return [
+            self._build_category_data(
+                transaction, match(str(transaction.get('description', '')).lower())
+            )
+            for transaction in transactions
+        ]
+    
+    def clear_cache(self):
+        self._description_match.cache_clear()
+    
+    def _match_description(self, description: str) -> Tuple[Optional[str], float, float]:
+        """(matched category, merchant risk, narration confidence) for a lower-cased description"""
+        matched_category = None
+        max_match_length = 0
+        
+        # IGNORECASE also folds a few non-ASCII letters (e.g. long s -> s), so
+        # substring tests are only equivalent on ASCII text
+        ascii_text = description.isascii()
+        
+        for cat_key, candidates in self._category_candidates.items():
+            for pattern, length, literal in candidates:
+                if length <= max_match_length:
+                    continue
+                if literal is not None and ascii_text:
+                    hit = literal in description
+                else:
+                    hit = pattern.search(description)
+                if hit:
+                    max_match_length = length
+                    matched_category = cat_key
+                    break
+        
+        merchant_risk_score = self._calculate_merchant_risk(description)
+        
+        if matched_category:
+            narration_risk_confidence = min(0.95, 0.5 + (max_match_length / 100))
+        else:
+            narration_risk_confidence = 0.3
+        
+        return matched_category, merchant_risk_score, narration_risk_confidence
+    
+    def _build_category_data(self, transaction: Dict[str, Any],
+                             match: Tuple[Optional[str], float, float]) -> Dict[str, Any]:
+        matched_category, merchant_risk_score, narration_risk_confidence = match
+        
         credit = safe_float(transaction.get('credit'))
         debit = safe_float(transaction.get('debit'))
-        amount = credit if credit > 0 else debit
         
         category = 'Unknown'
         subcategory = ''
-        merchant_risk_score = 0.5
-        narration_risk_confidence = 0.5
-        behavioral_deviation = 'Normal'
-        
-        matched_category = None
-        max_match_length = 0
-        
-        for cat_key, patterns in self.category_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, description, re.IGNORECASE):
-                    if len(pattern) > max_match_length:
-                        max_match_length = len(pattern)
-                        matched_category = cat_key
-                        break
         
         if matched_category:
             category = matched_category
@@ -119,13 +179,6 @@ class TransactionCategorizer:
             elif debit > 0:
                 category = 'Expense'
         
-        merchant_risk_score = self._calculate_merchant_risk(description)
-        
-        if matched_category:
-            narration_risk_confidence = min(0.95, 0.5 + (max_match_length / 100))
-        else:
-            narration_risk_confidence = 0.3
-        
         behavioral_deviation = self._determine_behavioral_deviation(transaction, category)
         
         return {
@@ -139,17 +192,14 @@ class TransactionCategorizer:
     def _calculate_merchant_risk(self, description: str) -> float:
         description = description.lower()
         
-        for keyword in self.merchant_risk_keywords['high_risk']:
-            if re.search(keyword, description):
-                return 0.9
+        if self._risk_regex['high_risk'].search(description):
+            return 0.9
         
-        for keyword in self.merchant_risk_keywords['medium_risk']:
-            if re.search(keyword, description):
-                return 0.6
+        if self._risk_regex['medium_risk'].search(description):
+            return 0.6
         
-        for keyword in self.merchant_risk_keywords['low_risk']:
-            if re.search(keyword, description):
-                return 0.2
+        if self._risk_regex['low_risk'].search(description):
+            return 0.2
         
         return 0.5
     
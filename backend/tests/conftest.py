@@ -0,0 +1,26 @@
+import enum
+import importlib.util
+import sys
+import types
+
+
+# services.transaction_detector is not part of this tree, but pdf_processor
+# (and main, through it) imports it. Register a minimal stand-in when the real
+# module is missing so those modules can be imported and tested.
+if importlib.util.find_spec("services.transaction_detector") is None:
+    class TransactionType(enum.Enum):
+        CREDIT = "credit"
+        DEBIT = "debit"
+        UNKNOWN = "unknown"
+
+    class AdvancedTransactionDetector:
+        def detect_transaction_type(self, text, debit=0.0, credit=0.0, amount=0.0):
+            return TransactionType.UNKNOWN, 0.0, []
+
+    _detector = AdvancedTransactionDetector()
+
+    stub = types.ModuleType("services.transaction_detector")
+    stub.TransactionType = TransactionType
+    stub.AdvancedTransactionDetector = AdvancedTransactionDetector
+    stub.get_detector = lambda: _detector
+    sys.modules["services.transaction_detector"] = stub
@@ -59,3 +59,81 @@ def test_extract_transactions_with_crdr_indicator():
     assert len(txns) == 2
     assert any(t["credit"] == 50000.0 for t in txns)
     assert any(t["debit"] == 2500.0 for t in txns)
+
+
+def test_extract_transactions_uses_first_of_duplicate_date_columns():
+    ep = ExcelProcessor()
+    df = pd.DataFrame([
+        {"Txn Date": "01/01/2025", "Value Date": "03/01/2025", "Narration": "NEFT FROM ACME", "Credit": "1,000.00", "Debit": None},
+        {"Txn Date": "05/01/2025", "Value Date": "06/01/2025", "Narration": "ATM WDL", "Credit": None, "Debit": "500"},
+    ])
+
+    xls = _write_excel_bytes({"Sheet1": df})
+    txns, _ = ep.extract_transactions(xls, "dup.xlsx")
+    assert [t["date"] for t in txns] == ["01/01/2025", "05/01/2025"]
+    assert txns[0]["amount"] == 1000.0
+    assert txns[1]["amount"] == -500.0
+
+
+def test_extract_party_cache_uses_full_narration():
+    ep = ExcelProcessor()
+    prefix = "NEFT INWARD REMITTANCE REF 000123456789 " * 2
+    assert len(prefix) >= 80
+
+    first, _ = ep._extract_party(prefix + "FROM RAMESH KUMAR")
+    second, _ = ep._extract_party(prefix + "FROM SURESH TRADERS")
+    assert first == "RAMESH KUMAR"
+    assert second == "SURESH"
+
+    ep.clear_cache()
+    assert ep._extract_party(prefix + "FROM RAMESH KUMAR")[0] == "RAMESH KUMAR"
+
+
+def test_extract_transactions_keeps_rows_with_out_of_range_dates():
+    from datetime import datetime
+
+    ep = ExcelProcessor()
+    rows = [
+        {"Date": datetime(2025, 1, d), "Narration": f"NEFT FROM ACME {d}", "Credit": 100.0 * d, "Debit": None}
+        for d in range(1, 6)
+    ]
+    rows.append({"Date": datetime(3025, 1, 9), "Narration": "ATM WDL", "Credit": None, "Debit": 500.0})
+
+    xls = _write_excel_bytes({"Sheet": pd.DataFrame(rows)})
+    txns, _ = ep.extract_transactions(xls, "typo.xlsx")
+    assert len(txns) == 6
+    assert txns[0]["date"] == "01/01/2025"
+    assert txns[-1]["date"] == "09/01/3025"
+    assert txns[-1]["amount"] == -500.0
+
+
+def test_extract_transactions_ignores_stale_sheet_dimension():
+    import re
+    import zipfile
+
+    df = pd.DataFrame([
+        {"Date": "01/01/2025", "Narration": "NEFT FROM ACME", "Credit": "1,000.00", "Debit": None},
+        {"Date": "02/01/2025", "Narration": "ATM WDL", "Credit": None, "Debit": "500"},
+    ])
+    xls = _write_excel_bytes({"Sheet1": df})
+
+    # Some writers emit a wrong <dimension>; rewrite it to claim a single cell
+    src, out = zipfile.ZipFile(io.BytesIO(xls)), io.BytesIO()
+    with zipfile.ZipFile(out, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                data = re.sub(rb'<dimension ref="[^"]*"\s*/>', b'<dimension ref="A1"/>', data)
+                assert b'<dimension ref="A1"/>' in data
+            dst.writestr(item, data)
+
+    txns, _ = ExcelProcessor().extract_transactions(out.getvalue(), "stale.xlsx")
+    assert [t["amount"] for t in txns] == [1000.0, -500.0]
+
+
+def test_extract_party_prefers_merchant_over_payment_rail():
+    ep = ExcelProcessor()
+    assert ep._extract_party("UPI/PAYTM/ZOMATO ORDER 1234") == ("ZOMATO", 0.95)
+    assert ep._extract_party("UPI-PHONEPE-SWIGGY-BANGALORE")[0] == "SWIGGY"
+    assert ep._extract_party("PAYTM ADD MONEY AMAZON")[0] == "AMAZON"
+    assert ep._extract_party("UPI/PAYTM/RECHARGE")[0] == "PAYTM"
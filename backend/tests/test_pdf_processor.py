@@ -0,0 +1,31 @@
+import io
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from services.pdf_processor import PDFProcessor
+
+
+def _column_drawn_statement():
+    """Statement table drawn one column at a time, so content-stream order != row order"""
+    rows = [
+        ("01/04/2025", "SALARY CREDIT ACME CORP", "5,000.00", "15,000.00"),
+        ("02/04/2025", "ATM WDL MG ROAD", "2,000.00", "13,000.00"),
+        ("03/04/2025", "UPI/DR/123456/MEENA STORES", "1,250.50", "11,749.50"),
+    ]
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    for col, x in enumerate((40, 120, 360, 460)):
+        for i, row in enumerate(rows):
+            c.drawString(x, 760 - 20 * i, row[col])
+    c.save()
+    return buf.getvalue()
+
+
+def test_extract_transactions_reads_column_drawn_tables_in_row_order():
+    txns = PDFProcessor().extract_transactions(_column_drawn_statement())
+
+    assert [t["date"] for t in txns] == ["01/04/2025", "02/04/2025", "03/04/2025"]
+    assert [t["credit"] or t["debit"] for t in txns] == [5000.0, 2000.0, 1250.5]
+    assert [t["balance"] for t in txns] == [15000.0, 13000.0, 11749.5]
+    assert "SALARY" in txns[0]["description"]
@@ -0,0 +1,31 @@
+from services.transaction_categorizer import TransactionCategorizer
+
+
+def test_categorize_transaction_prefers_longest_matching_pattern():
+    tc = TransactionCategorizer()
+    result = tc.categorize_transaction({"description": "SALARY CREDIT FOR MARCH", "credit": 50000})
+    assert result["category"] == "Income"
+    assert result["merchant_risk_score"] == 0.2
+    assert result["narration_risk_confidence"] == 0.56
+
+    result = tc.categorize_transaction({"description": "Netflix subscription", "debit": 649})
+    assert result["category"] == "Subscription"
+
+
+def test_categorize_many_matches_per_row_results():
+    tc = TransactionCategorizer()
+    txns = [
+        {"description": "UPI/DR/412345/RAMESH KUMAR/PAYMENT", "debit": 250},
+        {"description": "CHQ DEP 000123", "credit": 150000},
+        {"description": "UPI/DR/412345/RAMESH KUMAR/PAYMENT", "debit": 5},
+        {"description": "CASINO ROYALE", "debit": 5000},
+        {"description": None},
+    ]
+
+    batch = tc.categorize_many(txns)
+    tc.clear_cache()
+    assert batch == [tc.categorize_transaction(t) for t in txns]
+    assert batch[1]["category"] == "Income"
+    assert batch[1]["behavioral_deviation"] == "High Value"
+    assert batch[2]["behavioral_deviation"] == "Micro Transaction"
+    assert batch[3]["merchant_risk_score"] == 0.9